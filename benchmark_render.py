@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Render pipeline benchmark.
+
+Times each stage of create_instagram_post (decode, dominant colour, letterbox,
+price/logo/QR overlays, JPEG encode) and the full _save_post pipeline over a
+corpus of product images, then reports latency percentiles, peak memory and
+posts/sec. Results can be saved as JSON and compared against an earlier run.
+The measurements run in a fresh child process, so building or loading the corpus
+doesn't count towards the memory figures.
+
+Usage:
+  python benchmark_render.py [image_dir] [--iterations N] [--workers N]
+                             [--json results.json] [--compare baseline.json]
+
+Without image_dir a synthetic corpus is generated in memory: tiny, typical and
+4000px JPEGs, a CMYK JPEG, a palette PNG and an RGBA PNG.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import Image, ImageDraw
+
+import create_instagram_post as cip
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+STAGES = ('decode', 'color', 'format', 'price', 'logo', 'qr', 'encode', 'save_post', 'pipeline')
+BENCH_URL   = 'https://www.ebay.com/itm/1234567890'
+BENCH_PRICE = cip.Price(58.74, 'USD')
+BENCH_INDEX = 'bench'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+
+
+def _product_like(size, mode='RGB'):
+    """Gradient backdrop, a few solid shapes and sensor-style noise, so encodes behave like photos."""
+    w, h = size
+    img = Image.linear_gradient('L').resize(size).convert('RGB')
+    img = Image.merge('RGB', (img.getchannel(0), img.getchannel(0).rotate(90).resize(size), Image.new('L', size, 140)))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((w * 0.2, h * 0.15, w * 0.8, h * 0.75), fill=(180, 40, 50))
+    draw.rectangle((w * 0.35, h * 0.55, w * 0.65, h * 0.9), fill=(30, 60, 150))
+    noise = Image.effect_noise(size, 24).convert('RGB')
+    img = Image.blend(img, noise, 0.12)
+    if mode == 'RGBA':
+        alpha = Image.new('L', size, 0)
+        ImageDraw.Draw(alpha).ellipse((w * 0.1, h * 0.1, w * 0.9, h * 0.9), fill=255)
+        img.putalpha(alpha)
+    elif mode != 'RGB':
+        img = img.convert(mode)
+    return img
+
+
+def synthetic_corpus():
+    """(name, encoded bytes) pairs covering the sizes and modes marketplaces serve."""
+    specs = (
+        ('tiny_120x160.jpg',      (120, 160),   'RGB',  'JPEG', {'quality': 85}),
+        ('typical_1200x1600.jpg', (1200, 1600), 'RGB',  'JPEG', {'quality': 85}),
+        ('large_4000x3000.jpg',   (4000, 3000), 'RGB',  'JPEG', {'quality': 90}),
+        ('cmyk_2000x2000.jpg',    (2000, 2000), 'CMYK', 'JPEG', {'quality': 90}),
+        ('palette_800x800.png',   (800, 800),   'P',    'PNG',  {}),
+        ('rgba_1500x1500.png',    (1500, 1500), 'RGBA', 'PNG',  {}),
+    )
+    corpus = []
+    for name, size, mode, fmt, options in specs:
+        buf = io.BytesIO()
+        _product_like(size, mode).save(buf, fmt, **options)
+        corpus.append((name, buf.getvalue()))
+    return corpus
+
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(directory, name), 'rb') as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples):
+    """Latency stats in milliseconds for a list of durations in seconds."""
+    values = sorted(s * 1000 for s in samples)
+    return {
+        'n':       len(values),
+        'mean_ms': round(sum(values) / len(values), 3),
+        'p50_ms':  round(_percentile(values, 50), 3),
+        'p90_ms':  round(_percentile(values, 90), 3),
+        'p99_ms':  round(_percentile(values, 99), 3),
+        'max_ms':  round(values[-1], 3),
+    }
+
+
+def peak_rss_mb():
+    if not HAS_RESOURCE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_stages(data):
+    """One pass through every stage on a fresh decode; returns {stage: seconds}."""
+    timings = {}
+    clock = time.perf_counter
+
+    t = clock()
+    img = cip.open_image(io.BytesIO(data))
+    timings['decode'] = clock() - t
+
+    t = clock()
+    color = cip.get_dominant_color(img)
+    timings['color'] = clock() - t
+
+    t = clock()
+    canvas = cip.format_for_instagram(img, color)
+    timings['format'] = clock() - t
+
+    t = clock()
+    canvas = cip.add_price_overlay(canvas, BENCH_PRICE, color)
+    timings['price'] = clock() - t
+
+    t = clock()
+    canvas = cip.add_logo_overlay(canvas, BENCH_URL)
+    timings['logo'] = clock() - t
+
+    t = clock()
+    canvas = cip.add_qr_code_overlay(canvas, BENCH_URL, color)
+    timings['qr'] = clock() - t
+
+    t = clock()
+    cip.encode_jpeg(canvas.convert('RGB'))
+    timings['encode'] = clock() - t
+
+    t = clock()
+    cip._save_post(img, BENCH_PRICE, BENCH_URL, BENCH_INDEX)
+    timings['save_post'] = clock() - t
+    return timings
+
+
+def run_pipeline(data):
+    """Decode plus _save_post, the work one listing costs after its fetch."""
+    t = time.perf_counter()
+    img = cip.open_image(io.BytesIO(data))
+    cip._save_post(img, BENCH_PRICE, BENCH_URL, BENCH_INDEX)
+    return time.perf_counter() - t
+
+
+def _cleanup_outputs():
+    for layout in cip.OUTPUT_LAYOUTS:
+        for fmt in cip.OUTPUT_ENCODINGS:
+            try:
+                os.remove(cip._output_path(BENCH_INDEX, layout, fmt))
+            except OSError:
+                pass
+    cip._jpeg_report.clear()
+
+
+def _start_worker():
+    """
+    Single-process pool for benchmark(), started before the corpus exists: a child
+    spawned later inherits the parent's ru_maxrss high-water mark on Linux.
+    """
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    pool.submit(peak_rss_mb).result()
+    return pool
+
+
+def benchmark(corpus, iterations=10, workers=1):
+    baseline_rss = peak_rss_mb()  # interpreter, imports and the corpus itself
+    results = {
+        'meta': {
+            'timestamp':  time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python':     platform.python_version(),
+            'pillow':     Image.__version__,
+            'platform':   platform.platform(),
+            'cpu_count':  os.cpu_count(),
+            'numpy':      cip.HAS_NUMPY,
+            'color_mode': cip.DOMINANT_COLOR_MODE,
+            'qr_backend': cip.QR_BACKEND,
+            'jpeg':       dict(cip._jpeg_options(), quality=cip.JPEG_QUALITY, max_bytes=cip.JPEG_MAX_BYTES),
+            'iterations': iterations,
+            'workers':    workers,
+        },
+        'images':    [],
+        'stages':    {},
+        'per_image': {},
+    }
+    samples = {stage: [] for stage in STAGES}
+
+    for name, data in corpus:
+        with Image.open(io.BytesIO(data)) as probe:
+            info = {'name': name, 'bytes': len(data), 'size': list(probe.size), 'mode': probe.mode}
+        results['images'].append(info)
+        print(f"  {name:<24} {info['size'][0]}x{info['size'][1]} {info['mode']:<5} ", end='', flush=True)
+
+        run_stages(data)  # warm the font/logo/QR caches outside the measurements
+        image_samples = {stage: [] for stage in STAGES}
+        for _ in range(iterations):
+            for stage, seconds in run_stages(data).items():
+                image_samples[stage].append(seconds)
+            image_samples['pipeline'].append(run_pipeline(data))
+
+        results['per_image'][name] = {stage: summarize(s) for stage, s in image_samples.items()}
+        for stage, s in image_samples.items():
+            samples[stage].extend(s)
+        print(f"pipeline p50 {results['per_image'][name]['pipeline']['p50_ms']:.1f} ms")
+
+    results['stages'] = {stage: summarize(s) for stage, s in samples.items() if s}
+
+    # Throughput: every corpus image `iterations` times through the pipeline
+    jobs = [data for _, data in corpus] * iterations
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run_pipeline, jobs))
+    else:
+        for data in jobs:
+            run_pipeline(data)
+    elapsed = time.perf_counter() - start
+    results['throughput'] = {
+        'posts':         len(jobs),
+        'seconds':       round(elapsed, 3),
+        'posts_per_sec': round(len(jobs) / elapsed, 2),
+    }
+    results['baseline_rss_mb'] = baseline_rss
+    results['peak_rss_mb'] = peak_rss_mb()
+    _cleanup_outputs()
+    return results
+
+
+def print_report(results, baseline=None):
+    base_stages = (baseline or {}).get('stages', {})
+    print(f"\n{'stage':<10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'mean ms':>9}" + ("   vs baseline p50" if baseline else ""))
+    for stage in STAGES:
+        stats = results['stages'].get(stage)
+        if not stats:
+            continue
+        line = f"{stage:<10} {stats['p50_ms']:>9.2f} {stats['p90_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['mean_ms']:>9.2f}"
+        before = base_stages.get(stage)
+        if before and before['p50_ms']:
+            change = stats['p50_ms'] / before['p50_ms'] - 1
+            line += f"   {change:+.1%}" + ("  ✗ slower" if change > 0.10 else "")
+        print(line)
+
+    throughput = results['throughput']
+    print(f"\nThroughput: {throughput['posts_per_sec']:.2f} posts/sec "
+          f"({throughput['posts']} posts in {throughput['seconds']:.2f}s, {results['meta']['workers']} worker(s))")
+    if baseline and baseline.get('throughput'):
+        change = throughput['posts_per_sec'] / baseline['throughput']['posts_per_sec'] - 1
+        print(f"            {change:+.1%} vs baseline")
+    if results['peak_rss_mb'] is not None:
+        baseline_rss = results.get('baseline_rss_mb')
+        if baseline_rss is not None:
+            print(f"Peak memory (RSS): {results['peak_rss_mb']} MB "
+                  f"({baseline_rss} MB before rendering, +{results['peak_rss_mb'] - baseline_rss:.1f} MB)")
+        else:
+            print(f"Peak memory (RSS): {results['peak_rss_mb']} MB")
+
+
+def main():
+    argv = sys.argv[1:]
+    iterations = cip._pop_option(argv, '--iterations', 10, int)
+    workers    = cip._pop_option(argv, '--workers', 1, int)
+    json_path  = cip._pop_option(argv, '--json', None)
+    compare    = cip._pop_option(argv, '--compare', None)
+    pool = _start_worker()
+
+    if argv:
+        corpus = load_corpus(argv[0])
+        if not corpus:
+            print(f"✗ No images found in {argv[0]}")
+            sys.exit(1)
+        print(f"Benchmarking {len(corpus)} images from {argv[0]} ({iterations} iterations each)...")
+    else:
+        print("Generating synthetic corpus...")
+        corpus = synthetic_corpus()
+        print(f"Benchmarking {len(corpus)} images ({iterations} iterations each)...")
+
+    baseline = None
+    if compare:
+        try:
+            with open(compare) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not read baseline {compare}: {e}")
+            sys.exit(1)
+
+    with pool:
+        results = pool.submit(benchmark, corpus, iterations, max(1, workers)).result()
+    print_report(results, baseline)
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved: {json_path}")
+
+
+if __name__ == '__main__':
+    main()
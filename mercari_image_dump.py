@@ -5,7 +5,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import json, sys, time
+import json, sys
 
 url = sys.argv[1] if len(sys.argv) > 1 else 'https://www.mercari.com/us/item/m15360818077/'
 
@@ -20,7 +20,13 @@ chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64
 driver = webdriver.Chrome(options=chrome_options)
 driver.get(url)
 WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-time.sleep(3)
+# Poll for the rendered listing data instead of sleeping a fixed 3s
+try:
+    WebDriverWait(driver, 15, poll_frequency=0.1).until(lambda d: d.execute_script(
+        "var s = document.getElementById('__NEXT_DATA__'); return !!(s && s.textContent.length);"
+    ))
+except Exception:
+    print("⚠ __NEXT_DATA__ did not appear within 15s — dumping what rendered")
 soup = BeautifulSoup(driver.page_source, 'html.parser')
 driver.quit()
 
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the marketplaces.
+
+Serves a fixture store recorded with `create_instagram_post.py --record DIR`
+(pages, listing JSON, images, rendered browser pages and app-link resolutions)
+with configurable per-request latency and bandwidth, so fetch throughput,
+concurrency and cache behaviour can be measured repeatably with no network.
+
+Usage:
+  python create_instagram_post.py links.txt --record fixtures
+  python replay_server.py fixtures [--port 8765] [--latency MS] [--bandwidth KB/s]
+  python create_instagram_post.py links.txt --replay http://127.0.0.1:8765
+
+Requests per second, bytes served and unknown keys are printed on Ctrl-C and
+available as JSON from /__stats__.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLAY_PORT  = 8765
+CHUNK_SIZE   = 16 * 1024
+STORE_INDEX  = 'index.json'
+
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG', 'image/png'),
+    (b'GIF8', 'image/gif'),
+    (b'{', 'application/json'),
+    (b'[', 'application/json'),
+)
+
+
+def _sniff_type(body):
+    if body[:4] == b'RIFF' and body[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, content_type in _SIGNATURES:
+        if body.startswith(signature):
+            return content_type
+    return 'text/html; charset=utf-8'
+
+
+class FixtureStore:
+    """Recorded bodies keyed by create_instagram_post.fixture_key(), loaded into memory once."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, STORE_INDEX)) as f:
+            index = json.load(f)
+        self.app_links = index.get('app_links', {})
+        self.entries = {}
+        for key, meta in index.get('fixtures', {}).items():
+            try:
+                with open(os.path.join(directory, 'bodies', key), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                continue
+            content_type = meta.get('content_type') or _sniff_type(body)
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            self.entries[key] = (body, content_type, etag)
+
+
+class ReplayStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.not_modified = 0
+        self.misses = 0
+        self.bytes = 0
+
+    def add(self, sent=0, not_modified=False, miss=False):
+        with self.lock:
+            self.requests += 1
+            self.bytes += sent
+            self.not_modified += not_modified
+            self.misses += miss
+
+    def as_dict(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            'requests': self.requests,
+            'not_modified': self.not_modified,
+            'misses': self.misses,
+            'bytes': self.bytes,
+            'seconds': round(elapsed, 3),
+            'requests_per_sec': round(self.requests / elapsed, 2),
+        }
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so the client's connection pools are exercised
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        key = self.path.lstrip('/').split('?', 1)[0]
+        if key == '__app_links__':
+            self._send(200, json.dumps(server.store.app_links).encode('utf-8'), 'application/json', send_body=send_body)
+            return
+        if key == '__stats__':
+            self._send(200, json.dumps(server.stats.as_dict()).encode('utf-8'), 'application/json', send_body=send_body)
+            return
+
+        entry = server.store.entries.get(key)
+        if entry is None:
+            print(f"✗ miss {self.path}")
+            server.stats.add(miss=True)
+            self._send(404, b'', 'text/plain', send_body=send_body)
+            return
+
+        body, content_type, etag = entry
+        if self.headers.get('If-None-Match') == etag:
+            server.stats.add(not_modified=True)
+            self._send(304, b'', None, etag=etag, send_body=False)
+            return
+        sent = self._send(200, body, content_type, etag=etag, send_body=send_body)
+        server.stats.add(sent=sent)
+
+    def _send(self, status, body, content_type, etag=None, send_body=True):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not send_body or not body:
+            return 0
+
+        bandwidth = self.server.bandwidth
+        try:
+            for start in range(0, len(body), CHUNK_SIZE):
+                chunk = body[start:start + CHUNK_SIZE]
+                self.wfile.write(chunk)
+                if bandwidth:
+                    time.sleep(len(chunk) / bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        return len(body)
+
+
+def make_server(store_dir, port=REPLAY_PORT, latency_ms=0, bandwidth_kbps=0, host='127.0.0.1'):
+    """
+    Replay server for a fixture store. latency_ms is added before every response;
+    bandwidth_kbps (KB/s, 0 = unlimited) throttles each response body independently.
+    Use port=0 for a free port (read it back from server.server_address).
+    """
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.store     = FixtureStore(store_dir)
+    server.stats     = ReplayStats()
+    server.latency   = latency_ms / 1000
+    server.bandwidth = bandwidth_kbps * 1024
+    return server
+
+
+def start_server(store_dir, **options):
+    """make_server() running on a background thread; call server.shutdown() when done."""
+    server = make_server(store_dir, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    argv = sys.argv[1:]
+    options = {}
+    for name, cast in (('--port', int), ('--latency', float), ('--bandwidth', float)):
+        for j, a in enumerate(argv):
+            if a == name and j + 1 < len(argv):
+                options[name] = cast(argv[j + 1])
+                del argv[j:j + 2]
+                break
+            if a.startswith(name + '='):
+                options[name] = cast(a.split('=', 1)[1])
+                del argv[j]
+                break
+
+    if not argv:
+        print("Usage: python replay_server.py <fixture_dir> [--port 8765] [--latency MS] [--bandwidth KB/s]")
+        sys.exit(1)
+
+    try:
+        server = make_server(
+            argv[0],
+            port=options.get('--port', REPLAY_PORT),
+            latency_ms=options.get('--latency', 0),
+            bandwidth_kbps=options.get('--bandwidth', 0),
+        )
+    except OSError as e:
+        print(f"✗ Could not start: {e}")
+        sys.exit(1)
+
+    host, port = server.server_address[:2]
+    print(f"✓ Serving {len(server.store.entries)} fixtures and {len(server.store.app_links)} app links "
+          f"from {argv[0]} on http://{host}:{port}")
+    print(f"  latency {options.get('--latency', 0):g} ms, bandwidth "
+          + (f"{options['--bandwidth']:g} KB/s" if options.get('--bandwidth') else "unlimited"))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n{json.dumps(server.stats.as_dict())}")
+
+
+if __name__ == '__main__':
+    main()
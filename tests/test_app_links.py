@@ -0,0 +1,49 @@
+"""App links are resolved once, whatever the outcome, and QR canonicalisation never resolves."""
+
+import pytest
+import requests
+
+import create_instagram_post as cip
+
+SHORT = 'https://depop.app.link/abc123'
+
+
+@pytest.fixture
+def hops(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cip, 'HTTP_CACHE_ENABLED', False)
+    monkeypatch.setattr(cip, 'REPLAY_ORIGIN', None)
+    monkeypatch.setattr(cip, '_app_links', None)
+    return calls
+
+
+def follow(calls, result):
+    def _follow_redirects(url):
+        calls.append(url)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return _follow_redirects
+
+
+@pytest.mark.parametrize('result, final', [
+    ('https://www.depop.com/products/seller-item/', 'https://www.depop.com/products/seller-item/'),
+    (SHORT, SHORT),                                   # no meaningful redirect
+    ('https://depop.app.link/elsewhere', SHORT),      # still an app link
+    (requests.ConnectionError('offline'), SHORT),
+])
+def test_resolved_once(monkeypatch, hops, result, final):
+    monkeypatch.setattr(cip, '_follow_redirects', follow(hops, result))
+    assert cip.resolve_app_links([SHORT, SHORT]) == {SHORT: final}
+    assert cip._resolve_app_link(SHORT) == final
+    assert cip.resolve_app_links([SHORT]) == {}
+    assert len(hops) == 1
+
+
+def test_canonicalize_reads_cache_only(monkeypatch, hops):
+    monkeypatch.setattr(cip, '_follow_redirects', follow(hops, 'https://www.depop.com/products/seller-item/'))
+    assert cip._canonicalize_url(SHORT) == SHORT
+    assert hops == []
+    cip.resolve_app_links([SHORT])
+    assert cip._canonicalize_url(SHORT) == 'https://www.depop.com/products/seller-item/'
+    assert len(hops) == 1
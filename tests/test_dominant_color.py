@@ -0,0 +1,37 @@
+"""The NumPy histogram must pick the same bin as the pure-Python one."""
+
+import random
+
+import pytest
+from PIL import Image
+
+import create_instagram_post as cip
+
+pytestmark = pytest.mark.skipif(not cip.HAS_NUMPY, reason='numpy not installed')
+
+
+def noise_image(seed, size=cip.DOMINANT_COLOR_SAMPLE):
+    rng = random.Random(seed)
+    return Image.frombytes('RGB', size, bytes(rng.randrange(256) for _ in range(size[0] * size[1] * 3)))
+
+
+@pytest.mark.parametrize('fill', [
+    (235, 230, 225),  # top bins in every channel (key 7*81 + 7*9 + 7)
+    (200, 40, 120),
+    (20, 20, 20),     # bottom bin, just above the near-black cutoff
+])
+def test_histogram_np_matches_python(fill):
+    img = noise_image(1)
+    img.paste(fill, (0, 0, 90, 150))
+    assert cip._dominant_color_histogram_np(img) == cip._dominant_color_histogram(img)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_histogram_np_matches_python_on_noise(seed):
+    img = noise_image(seed)
+    assert cip._dominant_color_histogram_np(img) == cip._dominant_color_histogram(img)
+
+
+def test_histogram_np_all_background():
+    img = Image.new('RGB', cip.DOMINANT_COLOR_SAMPLE, (255, 255, 255))
+    assert cip._dominant_color_histogram_np(img) is None
@@ -0,0 +1,36 @@
+"""LRU eviction frees down to the low-water mark, so it doesn't rerun on every store."""
+
+import os
+
+import requests
+
+import create_instagram_post as cip
+
+
+def response(body):
+    r = requests.Response()
+    r.status_code = 200
+    r.headers['Content-Type'] = 'image/jpeg'
+    r._content = body
+    return r
+
+
+def test_evicts_to_low_water(tmp_path, monkeypatch):
+    monkeypatch.setattr(cip, 'HTTP_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cip, 'REPLAY_ORIGIN', None)
+    monkeypatch.setattr(cip, 'HTTP_CACHE_MAX_BYTES', 1000)
+    monkeypatch.setattr(cip, '_http_cache_bytes', None)
+    walks = []
+    evict = cip._http_cache_evict
+    monkeypatch.setattr(cip, '_http_cache_evict', lambda: (walks.append(1), evict()))
+
+    for i in range(11):
+        url = f'https://img.example.com/{i}.jpg'
+        cip._http_cache_store(url, response(b'x' * 100))
+        os.utime(cip._http_cache_paths(url)[0], (i, i))  # store order = LRU order
+
+    assert walks == [1]  # 1100 bytes > cap: one walk, down to 800
+    assert cip._http_cache_bytes == 800
+    assert cip._http_cache_load('https://img.example.com/0.jpg') == (None, None)
+    assert cip._http_cache_load('https://img.example.com/2.jpg') == (None, None)
+    assert cip._http_cache_load('https://img.example.com/3.jpg')[1] == b'x' * 100
@@ -0,0 +1,71 @@
+"""Streamed image downloads check the pixel count from the header, probing only a bounded prefix."""
+
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+import create_instagram_post as cip
+
+URL = 'https://img.example.com/item.jpg'
+
+
+class FakeStream:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    monkeypatch.setattr(cip, 'HTTP_CACHE_ENABLED', False)
+    monkeypatch.setattr(cip, 'REPLAY_ORIGIN', None)
+    probes = []
+    check = cip._check_image_pixels
+    monkeypatch.setattr(cip, '_check_image_pixels', lambda data, url: (probes.append(len(data)), check(data, url))[1])
+
+    def serve(body):
+        monkeypatch.setattr(cip, 'http_get', lambda *a, **kw: FakeStream(body))
+        return probes
+    return serve
+
+
+def png_header(width, height):
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + \
+        struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+
+
+@pytest.mark.filterwarnings('ignore::PIL.Image.DecompressionBombWarning')
+@pytest.mark.parametrize('size', [10000, 20000])  # 20000² also trips Pillow's own bomb check
+def test_oversized_header_rejected(serve, size):
+    serve(png_header(size, size) + struct.pack('>I', 100_000) + b'IDAT' + b'\0' * 100_000)
+    with pytest.raises(ValueError, match='too large'):
+        cip._download_image_bytes(URL)
+
+
+def test_late_header_probed_once_past_prefix(serve):
+    buf = io.BytesIO()
+    Image.new('RGB', (32, 32)).save(buf, 'JPEG')
+    jpeg = buf.getvalue()
+    # A 300 KB run of APP15 segments ahead of the frame header
+    padding = b''.join(b'\xff\xef' + struct.pack('>H', 60002) + b'\0' * 60000 for _ in range(5))
+    body = jpeg[:2] + padding + jpeg[2:]
+    probes = serve(body)
+    assert cip._download_image_bytes(URL) == body
+    assert len(probes) <= cip.IMAGE_PROBE_BYTES // (16 * 1024) + 1
+    assert probes[-1] == len(body)
@@ -0,0 +1,56 @@
+"""--incremental: one render per listing under concurrency, and no orphaned outputs."""
+
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import create_instagram_post as cip
+
+URL = 'https://www.depop.com/products/seller-item/'
+
+
+@pytest.fixture
+def renders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('output')
+    monkeypatch.setattr(cip, '_manifest', None)
+    monkeypatch.setattr(cip, '_listing_locks', {})
+    monkeypatch.setattr(cip, '_incremental_counts', {'rendered': 0, 'unchanged': 0})
+    monkeypatch.setattr(cip, 'OUTPUT_LAYOUTS', ('square',))
+    calls = []
+
+    def render_post(product_img, price, url, index):
+        calls.append(index)
+        time.sleep(0.05)
+        outputs = [cip._output_path(index, 'square', fmt) for fmt in cip.OUTPUT_ENCODINGS]
+        for path in outputs:
+            open(path, 'w').close()
+        return outputs
+    monkeypatch.setattr(cip, 'render_post', render_post)
+    return calls
+
+
+def render():
+    return cip.render_incremental(Image.new('RGB', (8, 8)), cip.Price(10.0, 'USD'), URL, URL)
+
+
+def test_duplicate_listing_rendered_once(renders):
+    threads = [threading.Thread(target=render) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(renders) == 1
+    assert cip._incremental_counts == {'rendered': 1, 'unchanged': 3}
+
+
+def test_dropped_format_outputs_deleted(renders, monkeypatch):
+    monkeypatch.setattr(cip, 'OUTPUT_ENCODINGS', ('jpeg', 'webp'))
+    jpeg, webp = render()[0]
+    monkeypatch.setattr(cip, 'OUTPUT_ENCODINGS', ('jpeg',))
+    assert render() == ([jpeg], True)
+    assert os.path.exists(jpeg) and not os.path.exists(webp)
+    assert cip._load_manifest()[cip._canonicalize_url(URL)]['outputs'] == [jpeg]
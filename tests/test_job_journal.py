@@ -0,0 +1,72 @@
+"""Batch journal: --resume / --retry-failed selection and outputs following their URL."""
+
+import os
+
+import pytest
+
+import create_instagram_post as cip
+
+A, B, C = (f'https://www.depop.com/products/seller-{name}/' for name in 'abc')
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    journals = []
+
+    def open_journal():
+        journals.append(cip.JobJournal('links.txt'))
+        return journals[-1]
+    yield open_journal
+    for j in journals:
+        j.close()
+
+
+def run(journal, urls, mode='fresh', fail=()):
+    """Start a batch and fake-render each selected line into its numbered output."""
+    positions = journal.start(urls, mode)
+    for position in positions:
+        url = urls[position - 1]
+        if url in fail:
+            journal.mark(position, 'failed', error='boom')
+            continue
+        path = cip._output_path(position, 'square', 'jpeg')
+        with open(path, 'w') as f:
+            f.write(url)
+        journal.mark(position, 'rendered', output=path)
+    return positions
+
+
+def rendered(position):
+    with open(cip._output_path(position, 'square', 'jpeg')) as f:
+        return f.read()
+
+
+def test_resume_skips_rendered(journal):
+    assert run(journal(), [A, B, C], fail={B}) == [1, 2, 3]
+    assert run(journal(), [A, B, C], 'resume') == [2]
+    os.remove(cip._output_path(1, 'square', 'jpeg'))
+    assert journal().start([A, B, C], 'resume') == [1]
+
+
+def test_insert_line_at_top(journal):
+    run(journal(), [A, B])
+    assert run(journal(), [C, A, B], 'resume') == [1]
+    assert [rendered(p) for p in (1, 2, 3)] == [C, A, B]
+    assert journal().counts() == {'rendered': 3}
+
+
+def test_swap_two_lines(journal):
+    run(journal(), [A, B])
+    assert run(journal(), [B, A], 'resume') == []
+    assert [rendered(p) for p in (1, 2)] == [B, A]
+    assert not [name for name in os.listdir('output') if name.endswith('.moving')]
+
+
+def test_retry_failed_runs_only_failures(journal):
+    run(journal(), [A, B, C], fail={B, C})
+    j = journal()
+    assert run(j, [A, B, C], 'failed', fail={C}) == [2, 3]
+    assert j.failures() == [(3, C, 'boom')]
+    assert rendered(1) == A and rendered(2) == B
+    assert journal().start([A, B, C], 'failed') == [3]
@@ -0,0 +1,101 @@
+"""Listing JSON extractors, checked against saved Depop and Poshmark responses."""
+
+import json
+import os
+
+import pytest
+import requests
+
+import create_instagram_post as cip
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+def test_depop_api_url():
+    url = 'https://www.depop.com/products/vintageshopnyc-vintage-90s-carhartt-detroit-jacket/?utm_source=ig'
+    assert cip.depop_listing_api(url) == \
+        'https://webapi.depop.com/api/v2/product/vintageshopnyc-vintage-90s-carhartt-detroit-jacket/'
+    assert cip.depop_listing_api('https://www.depop.com/vintageshopnyc/') is None
+
+
+def test_depop_from_api_uses_largest_picture_and_discount():
+    img_url, price = cip.depop_listing_from_api(load_fixture('depop_product_api.json'))
+    assert img_url.endswith('/1639051887_5f1ab7d3e1c14cb1a7c0f3fbb2b4ae0c/P0.jpg')
+    assert price == cip.Price(72.25, 'USD')
+
+
+def test_depop_from_api_without_discount():
+    data = load_fixture('depop_product_api.json')
+    del data['price']['discountedPriceAmount']
+    assert cip.depop_listing_from_api(data)[1] == cip.Price(85.0, 'USD')
+
+
+def test_depop_from_next_data():
+    img_url, price = cip.depop_listing_from_next_data(load_fixture('depop_product_next_data.json'))
+    assert img_url is None
+    assert price == cip.Price(85.0, 'GBP')
+
+
+def test_poshmark_api_url():
+    url = 'https://poshmark.com/listing/Levis-501-Original-Fit-Jeans-3230-64f1a2b3c4d5e6f708192a3b'
+    assert cip.poshmark_listing_api(url) == 'https://poshmark.com/vm-rest/posts/64f1a2b3c4d5e6f708192a3b'
+    assert cip.poshmark_listing_api('https://poshmark.com/closet/denimdeals') is None
+
+
+def test_poshmark_from_api_prefers_large_covershot():
+    img_url, price = cip.poshmark_listing_from_api(load_fixture('poshmark_post_api.json'))
+    assert '/l_64f1a2b9c4d5e6f708192a4c.jpg' in img_url
+    assert price == cip.Price(38.0, 'USD')
+
+
+def test_poshmark_from_next_data():
+    img_url, price = cip.poshmark_listing_from_next_data(load_fixture('poshmark_listing_next_data.json'))
+    assert '/l_64f1a2b9c4d5e6f708192a4c.jpg' in img_url
+    assert price == cip.Price(38.0, 'USD')
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def fresh_api_state(monkeypatch):
+    monkeypatch.setattr(cip, '_LISTING_API_DISABLED', set())
+    monkeypatch.setattr(cip, '_listing_api_misses', set())
+
+
+def test_listing_api_price_only(monkeypatch, fresh_api_state):
+    monkeypatch.setattr(cip, 'http_get', lambda *a, **kw: FakeResponse(load_fixture('poshmark_post_api.json')))
+    url = 'https://poshmark.com/listing/Levis-501-64f1a2b3c4d5e6f708192a3b'
+    assert cip.fetch_from_listing_api(url, price_only=True) == cip.Price(38.0, 'USD')
+
+
+def test_listing_api_image_failure_falls_back_to_page(monkeypatch, fresh_api_state):
+    calls = []
+
+    def http_get(api_url, **kw):
+        calls.append(api_url)
+        return FakeResponse(load_fixture('depop_product_api.json'))
+
+    def fetch_image(img_url, **kw):
+        raise requests.ConnectionError('image host down')
+
+    monkeypatch.setattr(cip, 'http_get', http_get)
+    monkeypatch.setattr(cip, 'fetch_image', fetch_image)
+    url = 'https://www.depop.com/products/vintageshopnyc-vintage-90s-carhartt-detroit-jacket/'
+    assert cip.fetch_from_listing_api(url) is None
+    # The page route's own attempt doesn't hit the endpoint again
+    assert cip.fetch_from_listing_api(url) is None
+    assert len(calls) == 1
@@ -0,0 +1,57 @@
+"""Replayed fetches go through the HTTP cache, so a second run revalidates with a 304."""
+
+import io
+
+import pytest
+from PIL import Image
+
+import create_instagram_post as cip
+import replay_server
+
+PAGE_URL  = 'https://www.depop.com/products/seller-item/'
+IMAGE_URL = 'https://media-photos.depop.com/b1/seller/P0.jpg'
+PAGE_BODY = b'<html><head><meta property="og:image" content="' + IMAGE_URL.encode() + b'"></head></html>'
+
+
+def jpeg_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 40, 40)).save(buf, 'JPEG')
+    return buf.getvalue()
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    store = str(tmp_path / 'fixtures')
+    monkeypatch.setattr(cip, 'RECORD_DIR', store)
+    monkeypatch.setattr(cip, '_fixture_index', None)
+    cip.record_fixture(PAGE_URL, PAGE_BODY, 'text/html')
+    cip.record_fixture(IMAGE_URL, jpeg_bytes())
+    cip.flush_fixtures()
+    monkeypatch.setattr(cip, 'RECORD_DIR', None)
+
+    server = replay_server.start_server(store, port=0)
+    host, port = server.server_address
+    monkeypatch.setattr(cip, 'REPLAY_ORIGIN', f'http://{host}:{port}')
+    monkeypatch.setattr(cip, 'REPLAY_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(cip, 'HTTP_CACHE_ENABLED', True)
+    monkeypatch.setattr(cip, 'HTTP_CACHE_TTL', 0)  # always stale: every hit is revalidated
+    monkeypatch.setattr(cip, '_http_cache_bytes', None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_replayed_page_revalidates(replay):
+    assert cip.http_get(PAGE_URL).content == PAGE_BODY
+    second = cip.http_get(PAGE_URL)
+    assert second.content == PAGE_BODY
+    assert getattr(second, 'from_cache', False)
+    assert replay.stats.not_modified == 1
+
+
+def test_replayed_image_revalidates(replay):
+    first = cip.fetch_image(IMAGE_URL)
+    second = cip.fetch_image(IMAGE_URL)
+    assert first.size == second.size == (64, 48)
+    assert replay.stats.not_modified == 1
+    assert replay.stats.misses == 0
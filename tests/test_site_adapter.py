@@ -0,0 +1,42 @@
+"""Host-based site dispatch and the QR canonical URLs it drives."""
+
+import pytest
+
+import create_instagram_post as cip
+
+
+@pytest.mark.parametrize('url, name', [
+    ('https://www.ebay.com/itm/1234567890', 'eBay'),
+    ('https://m.ebay.com/itm/1234567890', 'eBay'),
+    ('https://www.ebay.com.au/itm/1234567890', 'eBay'),
+    ('https://poshmark.com.au/listing/Jeans-64f1a2b3c4d5e6f708192a3b', 'Poshmark'),
+    ('https://au.pinterest.com/pin/1234/', 'Pinterest'),
+    ('https://pin.it/abc123', 'Pinterest'),
+    ('https://www.depop.com/products/seller-item/', 'Depop'),
+    ('https://example.com.au/item', None),
+])
+def test_site_adapter(url, name):
+    adapter = cip.site_adapter(url)
+    assert (adapter.name if adapter else None) == name
+
+
+def test_country_storefront_canonical_host():
+    url = 'https://www.ebay.com.au/itm/1234567890?_trksid=p123'
+    assert cip._canonicalize_url(url, resolve=False) == 'https://www.ebay.com/itm/1234567890'
+
+
+@pytest.mark.parametrize('url, key', [
+    ('https://www.ebay.com.au/itm/1234567890', 'eBay'),
+    ('https://m.ebay.com/itm/1234567890', 'eBay'),
+    ('https://shop.example.com.au/item', 'example.com.au'),
+    ('https://www.example.co.uk/item', 'example.co.uk'),
+    ('https://store.example.com/item', 'example.com'),
+    ('http://192.168.1.20:8000/item', '192.168.1.20'),
+])
+def test_site_key(url, key):
+    assert cip._site_key(url) == key
+
+
+def test_listing_key_site_prefix():
+    assert cip.listing_key('https://shop.example.com.au/item').startswith('example_')
+    assert cip.listing_key('http://192.168.1.20:8000/item').startswith('listing_')